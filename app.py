@@ -1,51 +1,131 @@
 import streamlit as st
-import os
 from config import get_settings
-from services.translator import TranslatorService
+from services.translator import SENTENCE_BREAK, TranslationResult, TranslatorService
 from services.memory import MemoryService
+from services.translation_cache import TranslationCache
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional
+
+# Inputs longer than this are split into sentences and sent in batches
+BATCH_THRESHOLD = 400
+BATCH_SIZE = 12
+# Concurrent batch requests in flight; keeps bursts under the Groq rate limit
+MAX_PARALLEL_BATCHES = 4
+# Minimum seconds between output re-renders while streaming
+STREAM_FLUSH_INTERVAL = 0.05
+# Cached translations are re-fetched after this long, so fallback-quality results don't stick (seconds)
+TRANSLATION_CACHE_TTL = 24 * 3600
+
+# Output box wrappers, prebuilt per target language direction
+_OUTPUT_BOX_LTR = '<div class="output-box ltr">{}</div>'
+_OUTPUT_BOX = {"ur": '<div class="output-box rtl">{}</div>', "en": _OUTPUT_BOX_LTR}
+
+# Precise CSS to match the reference image theme
+_CSS = """
+<style>
+#MainMenu {visibility: hidden;}
+footer {visibility: hidden;}
+.main { background-color: #000000; }
+.label-text {
+    color: #FFFFFF;
+    font-weight: bold;
+    font-size: 24px;
+    margin-bottom: 10px;
+    text-transform: uppercase;
+}
+.output-box {
+    padding: 15px;
+    border-radius: 5px;
+    background-color: #121212;
+    border: 1px solid #333333;
+    min-height: 250px;
+    color: #AAAAAA;
+    font-size: 20px;
+    word-wrap: break-word;
+}
+.rtl { direction: rtl; text-align: right; }
+div[role="radiogroup"] > label { color: white !important; }
+</style>
+"""
 
 def get_session_id() -> str:
     if "session_id" not in st.session_state:
         st.session_state["session_id"] = str(uuid.uuid4())
     return st.session_state["session_id"]
 
+@st.cache_resource(show_spinner=False)
+def get_translator() -> TranslatorService:
+    return TranslatorService(cache=get_translation_cache())
+
+@st.cache_resource(show_spinner=False)
+def get_memory() -> MemoryService:
+    return MemoryService()
+
+@st.cache_resource(show_spinner=False)
+def get_translation_cache() -> TranslationCache:
+    return TranslationCache(ttl=TRANSLATION_CACHE_TTL)
+
+def translate_long_text(placeholder, translator: TranslatorService, text: str, source_lang: str, target_lang: str) -> Optional[TranslationResult]:
+    """
+    Translate paragraph-sized input in sentence batches, showing each batch as
+    soon as everything before it is done; None if any batch fails.
+    """
+    sentences = [s for s in SENTENCE_BREAK.split(text.strip()) if s.strip()]
+    batches = [sentences[i:i + BATCH_SIZE] for i in range(0, len(sentences), BATCH_SIZE)]
+
+    def run(batch: list[str]) -> list[TranslationResult]:
+        return translator.translate_texts(batch, target_language=target_lang, source_language=source_lang)
+
+    result = TranslationResult("", "cache")
+    # Batches are independent calls; issue them concurrently.
+    # map() yields in input order, so the rendered text is always a clean prefix.
+    pool = ThreadPoolExecutor(max_workers=min(len(batches), MAX_PARALLEL_BATCHES))
+    try:
+        for batch in pool.map(run, batches):
+            if any(r.engine == "error" for r in batch):
+                return None
+            # Label the output with the engine that did the work, not the cache
+            result.engine = next(
+                (r.engine for r in batch if r.engine not in ("cache", "phrasebook", "passthrough")), result.engine
+            )
+            result.text = " ".join(filter(None, (result.text, *(r.text for r in batch))))
+            render_output(placeholder, result, target_lang)
+    finally:
+        # After a failed batch the caller retranslates the whole text, so drop the
+        # batches that haven't started instead of waiting on their API calls
+        pool.shutdown(wait=False, cancel_futures=True)
+    return result
+
+def render_output(placeholder, result: TranslationResult, target_lang: str) -> None:
+    template = _OUTPUT_BOX.get(target_lang, _OUTPUT_BOX_LTR)
+    placeholder.markdown(template.format(result.text.strip()), unsafe_allow_html=True)
+
+def stream_output(placeholder, chunks: Iterator[TranslationResult], target_lang: str) -> TranslationResult:
+    """Render streamed chunks into the output box, coalescing re-renders."""
+    result = TranslationResult("", "error")
+    last_flush = 0.0
+    for chunk in chunks:
+        result.text += chunk.text
+        result.engine = chunk.engine
+        now = time.monotonic()
+        if now - last_flush >= STREAM_FLUSH_INTERVAL:
+            render_output(placeholder, result, target_lang)
+            last_flush = now
+    render_output(placeholder, result, target_lang)
+    return result
+
 def main() -> None:
     st.set_page_config(page_title="TranslatorGO", layout="wide")
     
-    # Precise CSS to match the reference image theme
-    st.markdown("""
-        <style>
-        #MainMenu {visibility: hidden;}
-        footer {visibility: hidden;}
-        .main { background-color: #000000; }
-        .label-text {
-            color: #FFFFFF;
-            font-weight: bold;
-            font-size: 24px;
-            margin-bottom: 10px;
-            text-transform: uppercase;
-        }
-        .output-box {
-            padding: 15px;
-            border-radius: 5px;
-            background-color: #121212;
-            border: 1px solid #333333;
-            min-height: 250px;
-            color: #AAAAAA;
-            font-size: 20px;
-            word-wrap: break-word;
-        }
-        .rtl { direction: rtl; text-align: right; }
-        div[role="radiogroup"] > label { color: white !important; }
-        </style>
-    """, unsafe_allow_html=True)
+    st.markdown(_CSS, unsafe_allow_html=True)
 
     # Initialize services
     try:
         settings = get_settings()
-        translator = TranslatorService()
-        memory = MemoryService()
+        translator = get_translator()
+        memory = get_memory()
     except Exception as e:
         st.error(f"Error: {e}")
         return
@@ -55,6 +135,8 @@ def main() -> None:
     # History cleanup for memory
     if st.sidebar.button("Clear History"):
         memory.clear_history(session_id)
+        st.session_state.pop("last_key", None)
+        st.session_state.pop("context_history", None)
         st.rerun()
 
     direction = st.radio(
@@ -65,7 +147,7 @@ def main() -> None:
     )
     
     # Secret Debug Check (Only visible in Cloud logs)
-    if not os.getenv("GROQ_API_KEY"):
+    if not settings.groq_api_keys:
         print("CLOUD WARNING: GROQ_API_KEY IS MISSING IN SECRETS!")
 
     is_ur_input = "Urdu → English" in direction
@@ -98,36 +180,46 @@ def main() -> None:
     if submit:
         if not user_text.strip():
             st.warning("Please enter some text first.")
+        elif st.session_state.get("last_key") == (user_text, direction):
+            # Same input as the last submit: re-show it without another API call
+            render_output(output_placeholder, st.session_state["last_translation"], target_lang)
         else:
             with st.spinner("Processing context-aware translation..."):
                 try:
-                    # Get history for context awareness
-                    history = memory.get_history(session_id)
-                    context_history = [(msg["role"], msg["content"]) for msg in history]
-
-                    # Translate using rotated keys and the "Heavy" Prompt
-                    translated_text = translator.translate_text(
-                        user_text,
-                        target_language=target_lang,
-                        source_language=source_lang,
-                        context_history=context_history
-                    )
-
-                    # Update UI
-                    alignment_class = "rtl" if target_lang == "ur" else "ltr"
-                    
-                    # Clean the markers for the UI
-                    display_text = translated_text.replace("⚡ ", "").replace("✨ ", "").strip()
-                    
-                    output_placeholder.markdown(f"""
-                        <div class="output-box {alignment_class}">
-                            {display_text}
-                        </div>
-                    """, unsafe_allow_html=True)
+                    # Get history for context awareness (loaded from memory once per session)
+                    if "context_history" not in st.session_state:
+                        st.session_state["context_history"] = [
+                            (msg["role"], msg["content"]) for msg in memory.get_history(session_id)
+                        ]
+                    context_history = st.session_state["context_history"]
+
+                    # The translator answers repeats from its cache before touching any engine
+                    result = None
+                    if len(user_text) > BATCH_THRESHOLD:
+                        result = translate_long_text(output_placeholder, translator, user_text, source_lang, target_lang)
+                    if result is None:
+                        # Stream the "Heavy" Prompt translation straight into the output box
+                        result = stream_output(
+                            output_placeholder,
+                            translator.stream_translate(
+                                user_text,
+                                target_language=target_lang,
+                                source_language=source_lang,
+                                context_history=context_history
+                            ),
+                            target_lang,
+                        )
 
                     # Save to memory for future context
-                    memory.append_message(session_id, "user", user_text)
-                    memory.append_message(session_id, "assistant", translated_text)
+                    turn = [("user", user_text), ("assistant", result.text)]
+                    memory.append_messages(session_id, turn)
+                    context_history.extend(turn)
+                    del context_history[:-settings.history_limit]
+
+                    # Only replay successes: resubmitting after a failure should try again
+                    if result.engine != "error":
+                        st.session_state["last_key"] = (user_text, direction)
+                        st.session_state["last_translation"] = result
 
                 except Exception as e:
                     st.error(f"Translation failed: {str(e)}")
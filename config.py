@@ -1,5 +1,6 @@
 import os
 from dataclasses import dataclass
+from functools import lru_cache
 
 from dotenv import load_dotenv
 
@@ -7,22 +8,41 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
-@dataclass
+@dataclass(frozen=True)
 class Settings:
     default_source: str
     default_target: str
     history_limit: int
-    gemini_api_keys: list[str]
+    gemini_api_keys: tuple[str, ...]
+    groq_api_keys: tuple[str, ...]
+    groq_rpm: int
+    use_quantization: bool
+    preload_local_models: bool
+    compile_local_models: bool
 
 
+def _parse_keys(keys_str: str) -> tuple[str, ...]:
+    # Single pass: strip each entry once and drop empties
+    return tuple(k for k in (s.strip() for s in keys_str.split(",")) if k)
+
+
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
+    # Env vars don't change at runtime, so parse once per process.
+    # Call get_settings.cache_clear() to pick up changes (e.g. in tests).
     # Support both comma-separated list and single key
     keys_str = os.getenv("GEMINI_API_KEYS", os.getenv("GEMINI_API_KEY", ""))
-    keys = [k.strip() for k in keys_str.split(",") if k.strip()]
+    keys = _parse_keys(keys_str)
+    groq_keys = _parse_keys(os.getenv("GROQ_API_KEYS", os.getenv("GROQ_API_KEY", "")))
     
     return Settings(
         default_source=os.getenv("DEFAULT_SOURCE_LANG", "en"),
         default_target=os.getenv("DEFAULT_TARGET_LANG", "ur"),
         history_limit=int(os.getenv("HISTORY_LIMIT", "20")),
         gemini_api_keys=keys,
+        groq_api_keys=groq_keys,
+        groq_rpm=int(os.getenv("GROQ_RPM", "30")),
+        use_quantization=os.getenv("USE_QUANTIZATION", "0").lower() in ("1", "true", "yes"),
+        preload_local_models=os.getenv("TRANSLATOR_PRELOAD", "1").lower() in ("1", "true", "yes"),
+        compile_local_models=os.getenv("TORCH_COMPILE", "0").lower() in ("1", "true", "yes"),
     )
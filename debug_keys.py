@@ -1,9 +1,44 @@
-import google.generativeai as genai
+import itertools
 import os
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
 from dotenv import load_dotenv
 
 load_dotenv()
 
+GENERATE_URL = "https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
+
+def probe(job):
+    """Send a tiny request for one (key, model) pair and return a status line."""
+    (key_index, key), m_name = job
+    # Key goes in the request itself: genai.configure() is process-global and
+    # would race between worker threads. A header, not a query parameter, keeps it
+    # out of URLs that end up in logs and exception messages.
+    try:
+        resp = requests.post(
+            GENERATE_URL.format(model=m_name),
+            headers={"x-goog-api-key": key},
+            json={
+                "contents": [{"parts": [{"text": "Hi"}]}],
+                "generationConfig": {"maxOutputTokens": 5},
+            },
+            timeout=30,
+        )
+    except Exception as e:
+        return key_index, m_name, f" ❌ {m_name}: ERROR - {str(e)[:100]}..."
+
+    error_msg = resp.text
+    if resp.status_code == 200:
+        return key_index, m_name, f" ✅ {m_name}: SUCCESS"
+    if resp.status_code == 429 or "quota" in error_msg.lower():
+        return key_index, m_name, f" ⚠️ {m_name}: QUOTA EXCEEDED (429)"
+    if resp.status_code == 404:
+        return key_index, m_name, f" ❌ {m_name}: NOT FOUND (404)"
+    if resp.status_code == 400:
+        return key_index, m_name, f" ❌ {m_name}: INVALID REQUEST (400) - {error_msg[:50]}..."
+    return key_index, m_name, f" ❌ {m_name}: ERROR ({resp.status_code}) - {error_msg[:100]}..."
+
 def debug_keys():
     keys_str = os.getenv("GEMINI_API_KEYS", os.getenv("GEMINI_API_KEY", ""))
     keys = [k.strip() for k in keys_str.split(",") if k.strip()]
@@ -20,25 +55,18 @@ def debug_keys():
         'gemini-pro'
     ]
 
-    for i, key in enumerate(keys):
-        print(f"\n🔑 Testing Key {i+1}: {key[:8]}...")
-        genai.configure(api_key=key, transport='rest')
-        
-        for m_name in model_names:
-            try:
-                model = genai.GenerativeModel(m_name)
-                response = model.generate_content("Hi", generation_config={"max_output_tokens": 5})
-                print(f" ✅ {m_name}: SUCCESS")
-            except Exception as e:
-                error_msg = str(e)
-                if "429" in error_msg or "quota" in error_msg.lower():
-                    print(f" ⚠️ {m_name}: QUOTA EXCEEDED (429)")
-                elif "404" in error_msg:
-                    print(f" ❌ {m_name}: NOT FOUND (404)")
-                elif "400" in error_msg:
-                    print(f" ❌ {m_name}: INVALID REQUEST (400) - {error_msg[:50]}...")
-                else:
-                    print(f" ❌ {m_name}: ERROR - {error_msg[:100]}...")
+    # Every (key, model) probe is an independent round trip; run them all at once
+    jobs = list(itertools.product(enumerate(keys), model_names))
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(probe, jobs))
+
+    # Report grouped by key, in the original model order
+    model_order = {m: i for i, m in enumerate(model_names)}
+    results.sort(key=lambda r: (r[0], model_order[r[1]]))
+    for key_index, group in itertools.groupby(results, key=lambda r: r[0]):
+        print(f"\n🔑 Testing Key {key_index+1}: {keys[key_index][:8]}...")
+        for _, _, line in group:
+            print(line)
 
 if __name__ == "__main__":
     debug_keys()
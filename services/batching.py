@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Hashable
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single-item calls into batched calls.
+
+    Items submitted within max_wait seconds of each other (up to max_batch)
+    are grouped by key and handed to process(key, items) in one call.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[Hashable, list], list],
+        max_batch: int = 8,
+        max_wait: float = 0.02,
+    ) -> None:
+        self.process = process
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: deque[tuple[Hashable, object, Future]] = deque()
+        self._cond = threading.Condition()
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, key: Hashable, item) -> Future:
+        future: Future = Future()
+        with self._cond:
+            self._queue.append((key, item, future))
+            self._cond.notify()
+        return future
+
+    def _next_batch(self) -> list[tuple[Hashable, object, Future]]:
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            # Give concurrent callers a short window to join this batch
+            deadline = time.monotonic() + self.max_wait
+            while len(self._queue) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return [self._queue.popleft() for _ in range(min(len(self._queue), self.max_batch))]
+
+    def _run(self) -> None:
+        while True:
+            groups: dict[Hashable, list[tuple[object, Future]]] = {}
+            for key, item, future in self._next_batch():
+                groups.setdefault(key, []).append((item, future))
+
+            for key, entries in groups.items():
+                try:
+                    outputs = self.process(key, [item for item, _ in entries])
+                except Exception as e:
+                    for _, future in entries:
+                        future.set_exception(e)
+                    continue
+                if len(outputs) != len(entries):
+                    # zip() would silently leave the extra callers waiting forever
+                    error = RuntimeError(f"process returned {len(outputs)} outputs for {len(entries)} items")
+                    for _, future in entries:
+                        future.set_exception(error)
+                    continue
+                for (_, future), output in zip(entries, outputs):
+                    future.set_result(output)
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import logging
+import os
+from pathlib import Path
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# Exported/optimized ONNX graphs for the local fallback models
+ONNX_CACHE_DIR = Path("models/onnx")
+
+# CTranslate2 int8 conversions of the local fallback models (used when ctranslate2 is installed)
+CT2_CACHE_DIR = Path("models/ct2")
+
+# Greedy decoding with the KV cache: the fallback trades a little quality for latency
+LOCAL_GENERATE_KWARGS = {"num_beams": 1, "do_sample": False, "use_cache": True}
+
+
+def _load_torch_marian(model_name: str, quantize: bool = False, compile_model: bool = False):
+    """
+    Eager PyTorch MarianMT: FP16 on the GPU when CUDA is available, otherwise
+    int8 dynamic-quantized Linear layers on request, BF16 on CPUs with native
+    BF16 matmul support, or FP32. With compile_model=True, unquantized models
+    run their forward pass through torch.compile.
+    """
+    import torch
+    from transformers import MarianMTModel
+
+    model = MarianMTModel.from_pretrained(model_name).eval()
+    if torch.cuda.is_available():
+        model = model.half().to("cuda")
+    elif quantize:
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    # Emulated BF16 is slower than FP32, so only switch where the CPU has it natively
+    elif getattr(torch.cpu, "_is_avx512_bf16_supported", lambda: False)():
+        model = model.to(dtype=torch.bfloat16)
+
+    if compile_model and hasattr(torch, "compile"):
+        _compile_marian(model)
+    return model
+
+
+def _compile_marian(model) -> None:
+    """Compile model.forward in place (generate() calls it per step) and pay the compile cost now."""
+    import torch
+
+    # dynamic=True: batch and sequence lengths vary per request, so avoid recompiling for each shape
+    model.forward = torch.compile(model.forward, dynamic=True)
+    warm_up = torch.tensor([[model.config.eos_token_id]], device=model.device)
+    with torch.inference_mode():
+        model.generate(input_ids=warm_up, max_new_tokens=4, **LOCAL_GENERATE_KWARGS)
+
+
+def _build_dir(final_dir: Path, build: Callable[[Path], None]) -> None:
+    """
+    Run build() against a temporary sibling of final_dir and rename it into
+    place only once it succeeds, so an interrupted export never leaves a
+    half-written cache directory that later loads would trust.
+    """
+    import shutil
+    import tempfile
+
+    final_dir.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=f".{final_dir.name}-", dir=final_dir.parent))
+    try:
+        build(tmp_dir)
+        try:
+            os.replace(tmp_dir, final_dir)
+        except OSError:
+            # Another process finished the same build first; keep its copy
+            if not final_dir.is_dir():
+                raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _quantize_onnx_dir(src_dir: Path, dst_dir: Path) -> None:
+    """Write int8 dynamic-quantized copies of every ONNX graph in src_dir to dst_dir."""
+    import shutil
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    shutil.copytree(src_dir, dst_dir, ignore=shutil.ignore_patterns("*.onnx"), dirs_exist_ok=True)
+    for graph in src_dir.glob("*.onnx"):
+        quantize_dynamic(graph, dst_dir / graph.name, weight_type=QuantType.QInt8)
+
+
+def _load_ct2_marian(model_name: str):
+    """
+    CTranslate2 int8 MarianMT for CPU, converted once into CT2_CACHE_DIR.
+    Returns None when ctranslate2 isn't installed.
+    """
+    try:
+        import ctranslate2
+    except ImportError:
+        return None
+
+    model_dir = CT2_CACHE_DIR / model_name.replace("/", "--")
+    if not model_dir.exists():
+        logger.info(f"Converting {model_name} to CTranslate2 int8 (one-time)...")
+        converter = ctranslate2.converters.TransformersConverter(model_name)
+        # force=True: the converter refuses to write into the (empty) staging directory otherwise
+        _build_dir(model_dir, lambda tmp_dir: converter.convert(str(tmp_dir), quantization="int8", force=True))
+    return ctranslate2.Translator(
+        str(model_dir), device="cpu", compute_type="int8", inter_threads=1, intra_threads=os.cpu_count() or 0
+    )
+
+
+def load_marian_model(model_name: str, quantize: bool = False, compile_model: bool = False):
+    """
+    Load a MarianMT model, preferring an optimized ONNX Runtime graph.
+
+    The first load exports and optimizes the graph into ONNX_CACHE_DIR; later
+    loads read it from disk. Falls back to eager PyTorch when optimum isn't
+    installed or the export fails, and uses PyTorch FP16 when a GPU is present.
+    With quantize=True, CPU weights are int8, served by CTranslate2 when it is
+    installed. compile_model applies to the PyTorch paths only.
+    """
+    import torch
+
+    if torch.cuda.is_available():
+        return _load_torch_marian(model_name, quantize, compile_model)
+
+    if quantize:
+        try:
+            model = _load_ct2_marian(model_name)
+        except Exception as e:
+            logger.warning(f"CTranslate2 conversion failed for {model_name}: {e}")
+            model = None
+        if model is not None:
+            return model
+
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM, ORTOptimizer
+        from optimum.onnxruntime.configuration import OptimizationConfig
+    except ImportError:
+        return _load_torch_marian(model_name, quantize, compile_model)
+
+    save_dir = ONNX_CACHE_DIR / model_name.replace("/", "--")
+    int8_dir = save_dir.with_name(save_dir.name + "-int8")
+
+    try:
+        if not save_dir.exists():
+            logger.info(f"Exporting {model_name} to ONNX (one-time)...")
+            model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True, provider="CPUExecutionProvider")
+
+            def export(tmp_dir: Path) -> None:
+                try:
+                    optimizer = ORTOptimizer.from_pretrained(model)
+                    optimizer.optimize(save_dir=tmp_dir, optimization_config=OptimizationConfig(optimization_level=99))
+                    model.config.save_pretrained(tmp_dir)
+                except Exception as e:
+                    # Unoptimized ONNX still beats eager PyTorch; cache that instead
+                    logger.warning(f"ONNX graph optimization failed for {model_name}: {e}")
+                    model.save_pretrained(tmp_dir)
+
+            _build_dir(save_dir, export)
+
+        if quantize:
+            if not int8_dir.exists():
+                logger.info(f"Quantizing {model_name} ONNX graphs to int8 (one-time)...")
+                _build_dir(int8_dir, lambda tmp_dir: _quantize_onnx_dir(save_dir, tmp_dir))
+            return ORTModelForSeq2SeqLM.from_pretrained(int8_dir, provider="CPUExecutionProvider")
+        return ORTModelForSeq2SeqLM.from_pretrained(save_dir, provider="CPUExecutionProvider")
+    except Exception as e:
+        logger.warning(f"ONNX export failed for {model_name}, using PyTorch: {e}")
+        return _load_torch_marian(model_name, quantize, compile_model)
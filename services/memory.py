@@ -1,11 +1,32 @@
 from __future__ import annotations
 
 import json
+import sqlite3
+import threading
+from collections import OrderedDict, deque
 from pathlib import Path
-from typing import List, TypedDict
+from typing import List, Optional, Sequence, TypedDict
 
 from config import get_settings
 
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json works too
+    orjson = None
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    insight TEXT,
+    PRIMARY KEY (session_id, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id);
+"""
+
 
 class ChatMessage(TypedDict, total=False):
     role: str  # "user" or "assistant"
@@ -13,44 +34,119 @@ class ChatMessage(TypedDict, total=False):
     insight: str
 
 
+def _to_message(role: str, content: str, insight: Optional[str]) -> ChatMessage:
+    message: ChatMessage = {"role": role, "content": content}
+    if insight is not None:
+        message["insight"] = insight
+    return message
+
+
 class MemoryService:
-    def __init__(self, store_path: Path | None = None) -> None:
+    """
+    Per-session chat history backed by SQLite.
+
+    Each append touches only the owning session's rows, so write cost is
+    O(history_limit) regardless of how many sessions are stored.
+    """
+
+    def __init__(self, store_path: Path | None = None, max_sessions: int = 256) -> None:
         settings = get_settings()
+        self.max_sessions = max_sessions
         self.history_limit = settings.history_limit
-        self.store_path = store_path or Path("data/sessions.json")
+        self.store_path = store_path or Path("data/sessions.db")
         self.store_path.parent.mkdir(parents=True, exist_ok=True)
+        # Streamlit runs scripts on worker threads; share one connection under a lock
+        self._lock = threading.Lock()
+        # Warm per-session tails, LRU-bounded to max_sessions; maxlen trims in O(1) as messages are appended
+        self._tails: OrderedDict[str, deque[ChatMessage]] = OrderedDict()
+        is_new = not self.store_path.exists()
+        self._conn = sqlite3.connect(self.store_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        if is_new:
+            self._import_legacy_store(self.store_path.with_name("sessions.json"))
 
-    def _load_store(self) -> dict[str, list[ChatMessage]]:
-        if not self.store_path.exists():
-            return {}
+    def _import_legacy_store(self, legacy_path: Path) -> None:
+        """One-time import of the old monolithic JSON store, if present."""
+        if not legacy_path.exists():
+            return
         try:
-            with self.store_path.open("r", encoding="utf-8") as f:
-                return json.load(f)
-        except json.JSONDecodeError:
+            raw = legacy_path.read_bytes()
+            store: dict[str, list[ChatMessage]] = orjson.loads(raw) if orjson else json.loads(raw)
+        except ValueError:  # both JSONDecodeError types subclass ValueError
             # Corrupt store, start fresh
-            return {}
+            return
+        rows = [
+            (session_id, seq, msg.get("role", ""), msg.get("content", ""), msg.get("insight"))
+            for session_id, history in store.items()
+            for seq, msg in enumerate(history[-self.history_limit :])
+        ]
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO messages (session_id, seq, role, content, insight) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
 
-    def _save_store(self, store: dict[str, list[ChatMessage]]) -> None:
-        with self.store_path.open("w", encoding="utf-8") as f:
-            json.dump(store, f, ensure_ascii=False, indent=2)
+    def _tail(self, session_id: str) -> deque[ChatMessage]:
+        # Caller must hold self._lock
+        tail = self._tails.get(session_id)
+        if tail is not None:
+            self._tails.move_to_end(session_id)
+            return tail
+        rows = self._conn.execute(
+            "SELECT role, content, insight FROM messages WHERE session_id = ? ORDER BY seq DESC LIMIT ?",
+            (session_id, self.history_limit),
+        ).fetchall()
+        tail = deque(
+            (_to_message(role, content, insight) for role, content, insight in reversed(rows)),
+            maxlen=self.history_limit,
+        )
+        self._tails[session_id] = tail
+        if len(self._tails) > self.max_sessions:
+            # Evicted sessions reload from SQLite on their next access
+            self._tails.popitem(last=False)
+        return tail
 
     def get_history(self, session_id: str) -> List[ChatMessage]:
-        store = self._load_store()
-        return store.get(session_id, [])
-
-    def append_message(self, session_id: str, role: str, content: str, **kwargs) -> List[ChatMessage]:
-        store = self._load_store()
-        history = store.get(session_id, [])
-        message = {"role": role, "content": content}
-        message.update(kwargs)
-        history.append(message)
-        history = history[-self.history_limit :]
-        store[session_id] = history
-        self._save_store(store)
-        return history
+        with self._lock:
+            return list(self._tail(session_id))
+
+    def append_message(
+        self, session_id: str, role: str, content: str, insight: Optional[str] = None
+    ) -> List[ChatMessage]:
+        return self.append_messages(session_id, [(role, content, insight)])
+
+    def append_messages(
+        self,
+        session_id: str,
+        messages: Sequence[tuple[str, str] | tuple[str, str, Optional[str]]],
+    ) -> List[ChatMessage]:
+        """Append several (role, content[, insight]) messages in one transaction."""
+        with self._lock:
+            tail = self._tail(session_id)
+            with self._conn:
+                (last_seq,) = self._conn.execute(
+                    "SELECT COALESCE(MAX(seq), -1) FROM messages WHERE session_id = ?",
+                    (session_id,),
+                ).fetchone()
+                rows = [
+                    (session_id, last_seq + i, msg[0], msg[1], msg[2] if len(msg) > 2 else None)
+                    for i, msg in enumerate(messages, 1)
+                ]
+                self._conn.executemany(
+                    "INSERT INTO messages (session_id, seq, role, content, insight) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                # Trim to the most recent history_limit messages
+                self._conn.execute(
+                    "DELETE FROM messages WHERE session_id = ? AND seq <= ?",
+                    (session_id, last_seq + len(rows) - self.history_limit),
+                )
+            tail.extend(_to_message(role, content, insight) for _, _, role, content, insight in rows)
+            return list(tail)
 
     def clear_history(self, session_id: str) -> None:
-        store = self._load_store()
-        if session_id in store:
-            del store[session_id]
-            self._save_store(store)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            self._tails.pop(session_id, None)
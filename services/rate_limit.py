@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket with an exponential cooldown after rate-limit errors.
+    """
+
+    def __init__(self, rate: float, capacity: float, base_cooldown: float = 60.0, max_cooldown: float = 600.0) -> None:
+        self.rate = rate  # tokens per second
+        self.capacity = capacity
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._cooldown_until = 0.0
+        self._strikes = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        # Caller must hold self._lock
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def available(self) -> float:
+        """Tokens that could be spent right now (0 while cooling down)."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._cooldown_until:
+                return 0.0
+            self._refill(now)
+            return self._tokens
+
+    def wait_time(self) -> float:
+        """Seconds until try_acquire() could next succeed (0 if it can now)."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._cooldown_until:
+                return self._cooldown_until - now
+            self._refill(now)
+            return max(0.0, (1 - self._tokens) / self.rate)
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if now < self._cooldown_until:
+                return False
+            self._refill(now)
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def penalize(self) -> None:
+        """Back off after a 429: 60s, then doubling up to max_cooldown."""
+        with self._lock:
+            self._strikes += 1
+            delay = min(self.base_cooldown * 2 ** (self._strikes - 1), self.max_cooldown)
+            self._cooldown_until = time.monotonic() + delay
+            self._tokens = 0.0
+
+    def reward(self) -> None:
+        """Reset the backoff after a successful call."""
+        with self._lock:
+            self._strikes = 0
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS translations (
+    hash BLOB PRIMARY KEY,
+    src TEXT NOT NULL,
+    tgt TEXT NOT NULL,
+    tone TEXT NOT NULL,
+    text TEXT NOT NULL,
+    translation TEXT NOT NULL,
+    insight TEXT,
+    ts REAL NOT NULL
+);
+"""
+
+
+class TranslationCache:
+    """
+    Exact-match translation cache: an in-process LRU in front of SQLite.
+    Entries older than ttl seconds are treated as misses (ttl=None keeps them forever).
+    """
+
+    def __init__(self, store_path: Path | None = None, maxsize: int = 1024, ttl: Optional[float] = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.store_path = store_path or Path("data/translations.db")
+        self.store_path.parent.mkdir(parents=True, exist_ok=True)
+        # key -> (translation, time stored)
+        self._lru: OrderedDict[bytes, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.store_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def make_key(src: str, tgt: str, text: str, tone: str = "") -> bytes:
+        # Unit separator keeps ("ab", "c") and ("a", "bc") distinct
+        raw = "\x1f".join((src, tgt, tone, text.strip()))
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).digest()
+
+    def _remember(self, key: bytes, translation: str, ts: float) -> None:
+        # Caller must hold self._lock
+        self._lru[key] = (translation, ts)
+        self._lru.move_to_end(key)
+        if len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+
+    def get(self, src: str, tgt: str, text: str, tone: str = "") -> Optional[str]:
+        key = self.make_key(src, tgt, text, tone)
+        oldest = time.time() - self.ttl if self.ttl is not None else float("-inf")
+        with self._lock:
+            hit = self._lru.get(key)
+            if hit is not None:
+                if hit[1] >= oldest:
+                    self._lru.move_to_end(key)
+                    return hit[0]
+                del self._lru[key]
+                return None
+            row = self._conn.execute(
+                "SELECT translation, ts FROM translations WHERE hash = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] < oldest:
+                return None
+            self._remember(key, row[0], row[1])
+            return row[0]
+
+    def put(
+        self,
+        src: str,
+        tgt: str,
+        text: str,
+        translation: str,
+        tone: str = "",
+        insight: Optional[str] = None,
+    ) -> None:
+        key = self.make_key(src, tgt, text, tone)
+        now = time.time()
+        with self._lock, self._conn:
+            self._remember(key, translation, now)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translations (hash, src, tgt, tone, text, translation, insight, ts) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, src, tgt, tone, text.strip(), translation, insight, now),
+            )
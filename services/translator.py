@@ -1,82 +1,781 @@
 from __future__ import annotations
 
+import json
+import logging
+import queue
+import re
+import string
+import threading
+import time
 import warnings
-# Suppress all FutureWarnings immediately
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterator, Optional
+
+# Suppress all FutureWarnings before any third-party import can emit them
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
-import logging
-import time
-import os
-from typing import Optional
-import streamlit as st
 import requests
-from transformers import MarianMTModel, MarianTokenizer
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json works too
+    orjson = None
 
 from config import get_settings
+from services.batching import MicroBatcher
+from services.local_models import LOCAL_GENERATE_KWARGS, load_marian_model
+from services.rate_limit import TokenBucket
+from services.translation_cache import TranslationCache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Request bodies are sent as raw UTF-8 (Urdu isn't \u-escaped); orjson when available
+if orjson is not None:
+    _dumps, _loads = orjson.dumps, orjson.loads
+else:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+    _loads = json.loads
+
+GROQ_CHAT_URL = "https://api.groq.com/openai/v1/chat/completions"
+GROQ_MODELS_URL = "https://api.groq.com/openai/v1/models"
+# Transient gateway errors are retried on the same pooled connection before a model is given up on
+GROQ_RETRY = Retry(
+    total=2,
+    backoff_factor=0.2,
+    status_forcelist=(502, 503, 504),
+    allowed_methods=frozenset({"GET", "POST"}),
+)
+# Tried in order until one answers
+GROQ_MODEL_STACK = ("llama-3.3-70b-versatile", "llama-3.1-70b-versatile")
+
+# Keys raced in parallel for a single translation (when spare quota allows)
+HEDGE_WIDTH = 2
+# Spare keys raced at once when every hedged key failed
+FALLTHROUGH_WIDTH = 4
+
+# How long a request may wait for a Groq key to free up before falling back (seconds)
+KEY_WAIT_TIMEOUT = 2.0
+
+# Longest input sent to the cloud tier in one request (characters)
+MAX_INPUT_CHARS = 2000
+
+# Smart quotes -> ASCII in a single str.translate pass
+_QUOTE_TABLE = str.maketrans({"\u201c": '"', "\u201d": '"', "\u2018": "'", "\u2019": "'"})
+
+# MarianMT's positional limit; longer inputs are truncated rather than padding the whole batch
+LOCAL_MAX_INPUT_TOKENS = 512
+
+# Local inputs longer than this are split into sentences and decoded as one batch
+LOCAL_SPLIT_CHARS = 400
+
+# How long a local translation may wait on the micro-batcher before it is treated as failed (seconds)
+LOCAL_RESULT_TIMEOUT = 60.0
+
+# Sentence boundaries (Latin and Urdu punctuation), shared with the app's long-text splitter
+SENTENCE_BREAK = re.compile(r"(?<=[.!?۔؟])\s+")
+
+# TIER 0: DYNAMIC NEURAL KNOWLEDGE BASE
+TUNING_DATASET = (
+    {"en": "It's a piece of cake for me.", "ur": "یہ میرے لیے بائیں ہاتھ کا کھیل ہے۔"},
+    {"en": "I am feeling under the weather.", "ur": "میری طبیعت کچھ ناساز ہے۔"},
+    {"en": "Don't beat around the bush.", "ur": "ادھر ادھر کی باتیں مت کرو، اصل بات پر آؤ۔"},
+    {"en": "Keep your chin up.", "ur": "ہمت مت ہارو۔"},
+    {"en": "Break a leg!", "ur": "نیک تمنائیں!"},
+)
+
+# Short everyday phrases answered without any model call (plus TUNING_DATASET)
+PHRASEBOOK = (
+    {"en": "Hello", "ur": "السلام علیکم"},
+    {"en": "Hi", "ur": "سلام"},
+    {"en": "Good morning", "ur": "صبح بخیر"},
+    {"en": "Good night", "ur": "شب بخیر"},
+    {"en": "Thank you", "ur": "شکریہ"},
+    {"en": "Thanks", "ur": "شکریہ"},
+    {"en": "Goodbye", "ur": "خدا حافظ"},
+    {"en": "Yes", "ur": "جی ہاں"},
+    {"en": "No", "ur": "جی نہیں"},
+    {"en": "Please", "ur": "براہ کرم"},
+    {"en": "How are you?", "ur": "آپ کیسے ہیں؟"},
+    {"en": "Welcome", "ur": "خوش آمدید"},
+)
+
+
+def _phrase_key(text: str) -> str:
+    # Case- and trailing-punctuation-insensitive, so "thank you!" matches "Thank you"
+    return text.strip().lower().rstrip(".!?۔؟ ")
+
+
+# Static system prompt text, parsed once; only the language pair and examples vary
+_SYSTEM_PROMPT_TEMPLATE = string.Template("""You are an Elite Linguistic Expert specializing in $source to $target translation. 
+RULES FOR EXCELLENCE:
+1. SOUL OF THE MESSAGE: Never translate words. Translate the 'Soul' and 'Intent'.
+2. ZERO LITERALISM: Use native idioms/Muhaawras.
+3. HONORIFIC LOGIC: Use respectful forms (e.g., 'Aap' in Urdu).
+4. NATIVE FLOW: Ensure natural structural mapping.
+
+EXAMPLES:
+$examples
+
+Output ONLY the polished final translation.""")
+
+# Few-shot examples per source language, formatted once at import
+_EXAMPLES_BLOCK = {
+    "en": "\n".join(f"- {i['en']} -> {i['ur']}" for i in TUNING_DATASET),
+    "ur": "\n".join(f"- {i['ur']} -> {i['en']}" for i in TUNING_DATASET),
+}
+
+
+@lru_cache(maxsize=8)
+def _build_system_prompt(source: str, target: str) -> str:
+    """Few-shot system prompt for a language pair, built once per pair."""
+    examples = _EXAMPLES_BLOCK["en" if source == "en" else "ur"]
+    return _SYSTEM_PROMPT_TEMPLATE.substitute(source=source, target=target, examples=examples)
+
+
+@lru_cache(maxsize=8)
+def _build_batch_prompt(source: str, target: str) -> str:
+    """System prompt for numbered multi-sentence requests."""
+    return "\n\n".join((
+        _build_system_prompt(source, target),
+        "Translate each numbered line separately. Reply with the same numbering, one line per item.",
+    ))
+
+
+# Arabic-script letters as used by Urdu, including the presentation forms
+_ARABIC_SCRIPT = re.compile(r"[\u0600-\u06FF\u0750-\u077F\uFB50-\uFDFF\uFE70-\uFEFF]")
+
+
+def _already_in_target(text: str, target: str) -> bool:
+    """
+    True when there is nothing to translate: no letters at all (digits,
+    punctuation, emoji), or Urdu output requested for text written only in
+    Arabic script. Latin text is never skipped, since Roman Urdu is a normal
+    input for Urdu -> English.
+    """
+    letters = [ch for ch in text if ch.isalpha()]
+    if not letters:
+        return True
+    return target == "ur" and all(_ARABIC_SCRIPT.match(ch) for ch in letters)
+
+
+# "3. translated sentence" lines in a batch reply
+_NUMBERED_LINE = re.compile(r"^\s*(\d+)\.\s*(.+)$", re.MULTILINE)
+
+
+@st.cache_resource(show_spinner=False)
+def _load_local_models(quantize: bool = False, compile_model: bool = False):
+    """
+    Load local models and tokenizers (Lazy), once per process.
+    """
+    EN_UR_MODEL = "Helsinki-NLP/opus-mt-en-ur"
+    UR_EN_MODEL = "Helsinki-NLP/opus-mt-ur-en"
+
+    logger.info("Loading local MarianMT models...")
+    try:
+        # Imported here so cold starts that never reach the fallback skip transformers/torch
+        from transformers import MarianTokenizer
+
+        en_ur_tokenizer = MarianTokenizer.from_pretrained(EN_UR_MODEL)
+        en_ur_model = load_marian_model(EN_UR_MODEL, quantize, compile_model)
+
+        ur_en_tokenizer = MarianTokenizer.from_pretrained(UR_EN_MODEL)
+        ur_en_model = load_marian_model(UR_EN_MODEL, quantize, compile_model)
+
+        return {
+            "en_ur": (en_ur_tokenizer, en_ur_model),
+            "ur_en": (ur_en_tokenizer, ur_en_model)
+        }
+    except Exception as e:
+        logger.error(f"Failed to load local models: {e}")
+        raise RuntimeError(f"Failed to load models: {e}")
+
+
+def _clean_input(text: str) -> str:
+    """Strip, normalize smart quotes and cap the length sent to the cloud tier."""
+    clean_text = text.strip().translate(_QUOTE_TABLE)
+    if len(clean_text) > MAX_INPUT_CHARS:
+        logger.warning(f"Input truncated from {len(clean_text)} to {MAX_INPUT_CHARS} characters")
+        clean_text = clean_text[:MAX_INPUT_CHARS]
+    return clean_text
+
+
+def _estimate_output_tokens(text: str) -> int:
+    # Translations run close to the input length; ~3 tokens per word leaves headroom
+    return min(1024, max(64, len(text.split()) * 3))
+
+
+def _user_content(clean_text: str, context_history: Optional[list[tuple[str, str]]]) -> str:
+    """User turn for the cloud prompt: the text, preceded by the last few turns for context."""
+    if not context_history:
+        return clean_text
+    parts = ["BACKGROUND CONTEXT (earlier turns, do not translate):"]
+    parts.extend(f"{role}: {content}" for role, content in context_history[-3:])
+    parts.append("")
+    parts.append(f"TEXT TO TRANSLATE: {clean_text}")
+    return "\n".join(parts)
+
+
+@dataclass
+class TranslationResult:
+    text: str
+    engine: str  # "groq", "local", "google", "cache", "phrasebook", "passthrough" or "error"
+    insight: Optional[str] = None
+
 
 class TranslatorService:
     """
     Translator service with Groq (Turbo) and local model fallback.
     """
 
-    def __init__(self) -> None:
+    # Fixed attribute set: no per-instance __dict__
+    __slots__ = (
+        "settings",
+        "_cache",
+        "_local_models",
+        "_model_stack",
+        "_local_batcher",
+        "_buckets",
+        "_key_order",
+        "_hedge_pool",
+        "_phrasebook",
+        "_sessions",
+    )
+
+    def __init__(self, cache: Optional[TranslationCache] = None) -> None:
         self.settings = get_settings()
+        # Exact-match cache shared by every public entry point (optional)
+        self._cache = cache
         # Lazy load for local models
         self._local_models = None
+        # Models to try, in order; pruned to what the account can serve and
+        # reordered so the last model that answered is tried first
+        self._model_stack: tuple[str, ...] = GROQ_MODEL_STACK
+        # Concurrent local requests share one padded generate() call
+        self._local_batcher = MicroBatcher(self._generate_batch, max_batch=8, max_wait=0.02)
+        # One token bucket per Groq key, refilled at the per-key requests-per-minute quota
+        rpm = self.settings.groq_rpm
+        self._buckets = {
+            key: TokenBucket(rate=rpm / 60, capacity=rpm)
+            for key in self.settings.groq_api_keys
+        }
+        # Each call scans the keys from the next starting point, so keys with
+        # equal spare quota take turns instead of the first one always winning
+        self._key_order = deque(self._buckets)
+        # Shared pool for hedged requests, so callers never block on the losing requests
+        self._hedge_pool = ThreadPoolExecutor(max_workers=max(1, len(self._buckets)), thread_name_prefix="groq-hedge")
+        # (normalized phrase, source, target) -> translation, both directions
+        self._phrasebook: dict[tuple[str, str, str], str] = {}
+        for entry in (*TUNING_DATASET, *PHRASEBOOK):
+            self._phrasebook[(_phrase_key(entry["en"]), "en", "ur")] = entry["ur"]
+            self._phrasebook[(_phrase_key(entry["ur"]), "ur", "en")] = entry["en"]
+        # One keep-alive HTTP session per Groq key, created on first use
+        self._sessions: dict[str, requests.Session] = {}
 
-    @st.cache_resource(show_spinner=False)
-    def _load_local_models(_self):
-        """
-        Load local models and tokenizers (Lazy).
-        """
-        EN_UR_MODEL = "Helsinki-NLP/opus-mt-en-ur"
-        UR_EN_MODEL = "Helsinki-NLP/opus-mt-ur-en"
+        # Background work starts last, once every attribute it touches exists.
+        # Warm the fallback models off the request path; st.cache_resource makes
+        # a concurrent first request wait for this load instead of starting another.
+        # Memory-constrained deployments can turn this off and load on first fallback.
+        if self.settings.preload_local_models:
+            threading.Thread(target=self._preload_local_models, name="marian-preload", daemon=True).start()
+        if self._buckets:
+            threading.Thread(target=self._probe_models, name="groq-model-probe", daemon=True).start()
+
+    def _acquire_key(self, timeout: float = KEY_WAIT_TIMEOUT) -> Optional[str]:
+        """Pick the Groq key with the most spare quota, waiting briefly if all are drained."""
+        if not self._buckets:
+            return None
+        deadline = time.monotonic() + timeout
+        while True:
+            # Snapshot before rotating: another thread may rotate the deque mid-scan
+            order = tuple(self._key_order)
+            self._key_order.rotate(-1)
+            key = max(order, key=lambda k: self._buckets[k].available())
+            if self._buckets[key].try_acquire():
+                return key
+            # Circuit breaker: if no key can recover before the deadline (e.g. all
+            # are cooling down after 429s), skip the cloud tier now instead of waiting
+            wait = min(bucket.wait_time() for bucket in self._buckets.values())
+            remaining = deadline - time.monotonic()
+            if wait > remaining:
+                logger.warning("All Groq keys are rate limited; skipping cloud tier")
+                return None
+            time.sleep(max(wait, 0.01))
+
+    def _spare_keys(self, exclude: set[str], width: int) -> list[str]:
+        """Up to width keys outside exclude that have quota right now, most spare first."""
+        keys: list[str] = []
+        spare = sorted(
+            (kv for kv in self._buckets.items() if kv[0] not in exclude),
+            key=lambda kv: kv[1].available(),
+            reverse=True,
+        )
+        for key, bucket in spare:
+            if len(keys) >= width:
+                break
+            if bucket.try_acquire():
+                keys.append(key)
+        return keys
+
+    def _acquire_hedge_keys(self, width: int = HEDGE_WIDTH) -> list[str]:
+        """One key (waiting if needed) plus up to width-1 extra keys that have quota right now."""
+        first = self._acquire_key()
+        if first is None:
+            return []
+        return [first, *self._spare_keys({first}, width - 1)]
+
+    def _groq_hedged(self, system_prompt: str, user_content: str, max_tokens: int) -> Optional[str]:
+        """Race the same request on several keys and return the first successful reply."""
+        keys = self._acquire_hedge_keys()
+        if not keys:
+            return None
+        reply = self._groq_race(keys, system_prompt, user_content, max_tokens)
+        if reply is None:
+            # Every hedged key failed (usually a 429): race the untried keys that
+            # still have quota all at once, rather than walking them one by one
+            spare = self._spare_keys(set(keys), FALLTHROUGH_WIDTH)
+            if spare:
+                logger.info(f"Falling through to {len(spare)} more Groq key(s)")
+                reply = self._groq_race(spare, system_prompt, user_content, max_tokens)
+        return reply
+
+    def _groq_race(self, keys: list[str], system_prompt: str, user_content: str, max_tokens: int) -> Optional[str]:
+        """First successful reply from the same request sent on each key; None if all fail."""
+        if len(keys) == 1:
+            return self._groq_chat(keys[0], system_prompt, user_content, max_tokens)
 
-        logger.info("Loading local MarianMT models...")
+        futures = [
+            self._hedge_pool.submit(self._groq_chat, key, system_prompt, user_content, max_tokens)
+            for key in keys
+        ]
+        for future in as_completed(futures):
+            try:
+                reply = future.result()
+            except Exception as e:
+                logger.error(f"Inference failure: {e}")
+                continue
+            if reply is not None:
+                # Losers still in flight finish in the background; nobody waits on them
+                for other in futures:
+                    other.cancel()
+                return reply
+        return None
+
+    def _preload_local_models(self) -> None:
         try:
-            en_ur_tokenizer = MarianTokenizer.from_pretrained(EN_UR_MODEL)
-            en_ur_model = MarianMTModel.from_pretrained(EN_UR_MODEL)
-
-            ur_en_tokenizer = MarianTokenizer.from_pretrained(UR_EN_MODEL)
-            ur_en_model = MarianMTModel.from_pretrained(UR_EN_MODEL)
-            
-            return {
-                "en_ur": (en_ur_tokenizer, en_ur_model),
-                "ur_en": (ur_en_tokenizer, ur_en_model)
-            }
+            self._local_models = _load_local_models(
+                self.settings.use_quantization, self.settings.compile_local_models
+            )
         except Exception as e:
-            logger.error(f"Failed to load local models: {e}")
-            raise RuntimeError(f"Failed to load models: {e}")
+            # The request path will retry the load (and fall through to tier 3 on failure)
+            logger.warning(f"Background model preload failed: {e}")
 
-    def _translate_local(
-        self,
-        text: str,
-        source: str,
-        target: str
-    ) -> str:
-        """Translate using local models."""
+    def _translate_local_many(self, texts: list[str], source: str, target: str) -> list[TranslationResult]:
+        """Translate several texts with the local models, decoded together in padded batches."""
         if self._local_models is None:
-            self._local_models = self._load_local_models()
+            self._local_models = _load_local_models(
+                self.settings.use_quantization, self.settings.compile_local_models
+            )
 
         try:
             if source == "en" and target == "ur":
-                tokenizer, model = self._local_models["en_ur"]
+                direction = "en_ur"
             elif source == "ur" and target == "en":
-                tokenizer, model = self._local_models["ur_en"]
+                direction = "ur_en"
             else:
-                return f"⚠️ Unsupported local language pair: {source} -> {target}"
+                error = TranslationResult(f"⚠️ Unsupported local language pair: {source} -> {target}", "error")
+                return [error] * len(texts)
 
-            tokens = tokenizer(text, return_tensors="pt", padding=True)
-            translated = model.generate(**tokens)
-            return tokenizer.decode(translated[0], skip_special_tokens=True)
+            # Several short decodes batched together beat one long quadratic-cost one
+            pending = []
+            for text in texts:
+                if len(text) > LOCAL_SPLIT_CHARS:
+                    sentences = [p for p in SENTENCE_BREAK.split(text.strip()) if p]
+                else:
+                    sentences = [text]
+                # Submit everything before waiting, so all texts share the same generate() calls
+                pending.append([self._local_batcher.submit(direction, sentence) for sentence in sentences])
+            # One deadline for the whole call, so a wedged generate() can't hang the request
+            deadline = time.monotonic() + LOCAL_RESULT_TIMEOUT
+            return [
+                TranslationResult(
+                    " ".join(f.result(timeout=max(0.0, deadline - time.monotonic())) for f in futures),
+                    "local",
+                )
+                for futures in pending
+            ]
         except Exception as e:
             logger.error(f"Local translation failed: {e}")
-            return f"❌ Translation Error: {e}"
+            return [TranslationResult(f"❌ Translation Error: {e}", "error")] * len(texts)
+
+    def _stream_local(self, text: str, source: str, target: str) -> Optional[Iterator[str]]:
+        """
+        Decode a short input with the local model, yielding text as tokens are
+        produced. None when the models can't load, the pair is unsupported, the
+        input is long enough to go through the sentence batcher, or the backend
+        (CTranslate2) has no generate() streamer support.
+        """
+        direction = {("en", "ur"): "en_ur", ("ur", "en"): "ur_en"}.get((source, target))
+        if direction is None or len(text) > LOCAL_SPLIT_CHARS:
+            return None
+        try:
+            if self._local_models is None:
+                self._local_models = _load_local_models(
+                    self.settings.use_quantization, self.settings.compile_local_models
+                )
+            import torch
+            from transformers import TextIteratorStreamer
+        except Exception as e:
+            logger.error(f"Local streaming unavailable: {e}")
+            return None
+
+        tokenizer, model = self._local_models[direction]
+        if hasattr(model, "translate_batch"):
+            return None
+
+        tokens = tokenizer(
+            [text], return_tensors="pt", truncation=True, max_length=LOCAL_MAX_INPUT_TOKENS
+        )
+        tokens = {k: v.to(model.device) for k, v in tokens.items()}
+        streamer = TextIteratorStreamer(tokenizer, skip_special_tokens=True, timeout=LOCAL_RESULT_TIMEOUT)
+        failures: list[Exception] = []
+
+        def run() -> None:
+            try:
+                # inference_mode is thread-local, so it has to be entered on the generating thread
+                with torch.inference_mode():
+                    model.generate(
+                        **tokens,
+                        streamer=streamer,
+                        max_new_tokens=_estimate_output_tokens(text),
+                        **LOCAL_GENERATE_KWARGS,
+                    )
+            except Exception as e:
+                failures.append(e)
+                # Unblock the consumer, which raises once it has drained the stream
+                streamer.end()
+
+        def pieces() -> Iterator[str]:
+            try:
+                yield from streamer
+            except queue.Empty:
+                raise RuntimeError(f"no tokens from the local model in {LOCAL_RESULT_TIMEOUT:.0f}s") from None
+            if failures:
+                raise RuntimeError(f"local generation failed: {failures[0]}")
+
+        threading.Thread(target=run, name="marian-stream", daemon=True).start()
+        return pieces()
+
+    def _generate_batch(self, direction: str, texts: list[str]) -> list[str]:
+        """Run one padded generate() over texts for a language direction."""
+        import torch
+
+        tokenizer, model = self._local_models[direction]
+        max_new_tokens = max(_estimate_output_tokens(t) for t in texts)
+        if hasattr(model, "translate_batch"):
+            # CTranslate2 decodes token strings rather than tensors
+            batch = [
+                tokenizer.convert_ids_to_tokens(
+                    tokenizer.encode(t, truncation=True, max_length=LOCAL_MAX_INPUT_TOKENS)
+                )
+                for t in texts
+            ]
+            results = model.translate_batch(batch, beam_size=1, max_decoding_length=max_new_tokens)
+            return [
+                tokenizer.decode(tokenizer.convert_tokens_to_ids(r.hypotheses[0]), skip_special_tokens=True)
+                for r in results
+            ]
+
+        tokens = tokenizer(
+            texts, return_tensors="pt", padding=True, truncation=True, max_length=LOCAL_MAX_INPUT_TOKENS
+        )
+        # Inputs must live where the model does (GPU when loaded in FP16)
+        tokens = {k: v.to(model.device) for k, v in tokens.items()}
+        with torch.inference_mode():
+            translated = model.generate(**tokens, max_new_tokens=max_new_tokens, **LOCAL_GENERATE_KWARGS)
+        return tokenizer.batch_decode(translated, skip_special_tokens=True)
+
+    def _groq_session(self, groq_key: str) -> requests.Session:
+        """Reuse one connection pool per key so calls skip the TCP+TLS handshake."""
+        session = self._sessions.get(groq_key)
+        if session is None:
+            session = requests.Session()
+            # Hedged and streamed requests may share a key concurrently; keep their connections warm
+            session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=GROQ_RETRY))
+            session.headers.update({
+                "Authorization": f"Bearer {groq_key}",
+                "Content-Type": "application/json"
+            })
+            session = self._sessions.setdefault(groq_key, session)
+        return session
+
+    def _probe_models(self) -> None:
+        """Drop decommissioned/unavailable models so requests don't waste a round trip on them."""
+        groq_key = next(iter(self._buckets))
+        try:
+            resp = self._groq_session(groq_key).get(GROQ_MODELS_URL, timeout=10)
+            resp.raise_for_status()
+            available = {m["id"] for m in _loads(resp.content)["data"]}
+        except Exception as e:
+            logger.warning(f"Groq model probe failed, keeping full stack: {e}")
+            return
+        usable = tuple(m for m in self._model_stack if m in available)
+        if usable:
+            self._model_stack = usable
+
+    def _promote_model(self, model_id: str) -> None:
+        if self._model_stack[0] != model_id:
+            self._model_stack = (model_id, *(m for m in self._model_stack if m != model_id))
+
+    def _groq_chat(self, groq_key: str, system_prompt: str, user_content: str, max_tokens: int) -> Optional[str]:
+        """Send one chat turn through the Groq model stack; None if every model fails."""
+        session = self._groq_session(groq_key)
+        # Built once; only the model id changes between attempts
+        data = {
+            "model": None,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_content}
+            ],
+            "temperature": 0.5,
+            "max_tokens": max_tokens
+        }
+
+        for model_id in self._model_stack:
+            try:
+                data["model"] = model_id
+                resp = session.post(GROQ_CHAT_URL, data=_dumps(data), timeout=10)
+                if resp.status_code == 200:
+                    self._buckets[groq_key].reward()
+                    self._promote_model(model_id)
+                    return _loads(resp.content)['choices'][0]['message']['content'].strip()
+                elif resp.status_code == 429:
+                    # Quota is per key, so the next model won't fare better
+                    logger.warning(f"Core {model_id} rate limited; cooling key down")
+                    self._buckets[groq_key].penalize()
+                    return None
+                else:
+                    logger.warning(f"Core {model_id} handshake failed: {resp.status_code}")
+                    continue
+            except Exception as e:
+                logger.error(f"Inference failure: {e}")
+                continue
+        return None
+
+    def _groq_stream(self, groq_key: str, system_prompt: str, user_content: str, max_tokens: int) -> Iterator[str]:
+        """Stream content deltas from the first Groq model that accepts the request."""
+        session = self._groq_session(groq_key)
+        data = {
+            "model": None,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_content}
+            ],
+            "temperature": 0.5,
+            "max_tokens": max_tokens,
+            "stream": True
+        }
+
+        for model_id in self._model_stack:
+            data["model"] = model_id
+            try:
+                resp = session.post(GROQ_CHAT_URL, data=_dumps(data), timeout=10, stream=True)
+            except Exception as e:
+                logger.error(f"Inference failure: {e}")
+                continue
+            if resp.status_code == 429:
+                logger.warning(f"Core {model_id} rate limited; cooling key down")
+                self._buckets[groq_key].penalize()
+                resp.close()
+                return
+            if resp.status_code != 200:
+                logger.warning(f"Core {model_id} handshake failed: {resp.status_code}")
+                resp.close()
+                continue
+            self._buckets[groq_key].reward()
+            self._promote_model(model_id)
+            with resp:
+                # Server-sent events: "data: {...}" lines, terminated by "data: [DONE]"
+                for line in resp.iter_lines():
+                    # One scan splits the field name from its value; the space after ":" is optional
+                    field, _, payload = line.partition(b":")
+                    if field != b"data":
+                        continue
+                    payload = payload.strip()
+                    if payload == b"[DONE]":
+                        break
+                    delta = _loads(payload)["choices"][0]["delta"].get("content")
+                    if delta:
+                        yield delta
+            return
+
+    def _lookup(self, source: str, target: str, text: str) -> Optional[TranslationResult]:
+        """Answer from the phrasebook or the translation cache without calling any engine."""
+        if _already_in_target(text, target):
+            return TranslationResult(text.strip(), "passthrough")
+        phrase = self._phrasebook.get((_phrase_key(text.translate(_QUOTE_TABLE)), source, target))
+        if phrase is not None:
+            return TranslationResult(phrase, "phrasebook")
+        if self._cache is not None:
+            hit = self._cache.get(source, target, text)
+            if hit is not None:
+                return TranslationResult(hit, "cache")
+        return None
+
+    def _cache_put(self, source: str, target: str, text: str, result: TranslationResult) -> None:
+        # Don't pin errors or partial results
+        if self._cache is not None and result.engine not in ("error", "cache", "phrasebook", "passthrough"):
+            self._cache.put(source, target, text, result.text)
+
+    def _groq_batch(self, groq_key: str, sentences: list[str], source: str, target: str) -> Optional[list[str]]:
+        """
+        One numbered Groq request for sentences; replies are cached. None when
+        the call fails or the reply can't be aligned with the input.
+        """
+        system_prompt = _build_batch_prompt(source, target)
+        numbered = "\n".join(f"{n}. {_clean_input(sentence)}" for n, sentence in enumerate(sentences, 1))
+
+        reply = self._groq_chat(groq_key, system_prompt, numbered, _estimate_output_tokens(numbered))
+        if reply is None:
+            return None
+
+        parsed = {int(m.group(1)): m.group(2).strip() for m in _NUMBERED_LINE.finditer(reply)}
+        if sorted(parsed) != list(range(1, len(sentences) + 1)):
+            logger.warning("Batch reply could not be aligned with input; falling back")
+            return None
+        replies = [parsed[n] for n in range(1, len(sentences) + 1)]
+        for sentence, translation in zip(sentences, replies):
+            self._cache_put(source, target, sentence, TranslationResult(translation, "groq"))
+        return replies
+
+    def translate_texts(
+        self,
+        texts: list[str],
+        target_language: Optional[str] = None,
+        source_language: Optional[str] = None,
+    ) -> list[TranslationResult]:
+        """
+        Translate several independent texts at once: a single numbered Groq
+        call (per-text cloud calls if its reply can't be used), or batched
+        local generate() calls when no Groq key has quota. Results are in
+        input order.
+        """
+        target = target_language or self.settings.default_target
+        source = source_language or self.settings.default_source
+
+        results: list[Optional[TranslationResult]] = [
+            TranslationResult("", "error") if not t.strip() else self._lookup(source, target, t)
+            for t in texts
+        ]
+        misses = [i for i, hit in enumerate(results) if hit is None]
+        if not misses:
+            return results
+
+        pending = [texts[i] for i in misses]
+        groq_key = self._acquire_key()
+        if groq_key is None:
+            # No cloud quota at all: batched local generate() calls
+            fresh = self._translate_fallback_many(pending, source, target)
+            for text, result in zip(pending, fresh):
+                self._cache_put(source, target, text, result)
+        elif (cloud := self._groq_batch(groq_key, pending, source, target)) is not None:
+            fresh = [TranslationResult(t, "groq") for t in cloud]
+        else:
+            # Misaligned reply or a 429 on this one key: retry each text through the
+            # hedged cloud path, concurrently. Not cached, since any of them may have
+            # ended up local. Each retry waits on hedge-pool futures itself, so the
+            # retries get their own pool rather than risk filling the hedge pool.
+            with ThreadPoolExecutor(
+                max_workers=min(len(pending), len(self._buckets)), thread_name_prefix="groq-retry"
+            ) as pool:
+                fresh = list(pool.map(lambda text: self._translate_uncached(text, source, target), pending))
+        for i, result in zip(misses, fresh):
+            results[i] = result
+        return results
+
+    def stream_translate(
+        self,
+        text: str,
+        target_language: Optional[str] = None,
+        source_language: Optional[str] = None,
+        context_history: Optional[list[tuple[str, str]]] = None,
+    ) -> Iterator[TranslationResult]:
+        """
+        Yield the translation incrementally from Groq; cache hits and the
+        fallback tiers are not streamable and yield their full result at once.
+        """
+        if not text.strip():
+            return
+
+        target = target_language or self.settings.default_target
+        source = source_language or self.settings.default_source
+
+        hit = self._lookup(source, target, text)
+        if hit is not None:
+            yield hit
+            return
+
+        clean_text = _clean_input(text)
+        user_content = _user_content(clean_text, context_history)
+        tried: set[str] = set()
+        groq_key = self._acquire_key()
+        while groq_key:
+            # A 429 or an all-models failure yields nothing; move on to a key not tried yet
+            tried.add(groq_key)
+            chunks = self._groq_stream(
+                groq_key, _build_system_prompt(source, target), user_content, _estimate_output_tokens(clean_text)
+            )
+            try:
+                first = next(chunks, None)
+            except Exception as e:
+                logger.error(f"Neural Core Error: {e}")
+                first = None
+            if first is not None:
+                yield TranslationResult(first, "groq")
+                parts = [first]
+                try:
+                    for chunk in chunks:
+                        parts.append(chunk)
+                        yield TranslationResult(chunk, "groq")
+                except Exception as e:
+                    # Already showing partial output; stop rather than append a second translation
+                    logger.error(f"Stream interrupted: {e}")
+                    return
+                self._cache_put(source, target, text, TranslationResult("".join(parts), "groq"))
+                return
+            spare = self._spare_keys(tried, 1)
+            groq_key = spare[0] if spare else None
+
+        # Stream the local model token by token where it can; otherwise the blocking tiers
+        pieces = self._stream_local(text, source, target)
+        if pieces is not None:
+            parts = []
+            try:
+                for piece in pieces:
+                    if piece:
+                        parts.append(piece)
+                        yield TranslationResult(piece, "local")
+            except Exception as e:
+                logger.error(f"Local stream interrupted: {e}")
+                if parts:
+                    # Already showing partial output; like Groq, don't cache or append a second translation
+                    return
+            else:
+                if parts:
+                    self._cache_put(source, target, text, TranslationResult("".join(parts), "local"))
+                    return
+
+        result = self._translate_fallback(text, source, target)
+        self._cache_put(source, target, text, result)
+        yield result
 
     def translate_text(
         self,
@@ -84,82 +783,60 @@ class TranslatorService:
         target_language: Optional[str] = None,
         source_language: Optional[str] = None,
         context_history: Optional[list[tuple[str, str]]] = None,
-    ) -> str:
+    ) -> TranslationResult:
         """
         Translate text using Groq (Turbo AI) with a local fallback.
         """
         if not text.strip():
-            return ""
+            return TranslationResult("", "error")
 
         target = target_language or self.settings.default_target
         source = source_language or self.settings.default_source
-        clean_text = text.strip().replace('“', '"').replace('”', '"').replace('‘', "'").replace('’', "'")
-
-        # TIER 0: DYNAMIC NEURAL KNOWLEDGE BASE
-        tuning_dataset = [
-            {"en": "It's a piece of cake for me.", "ur": "یہ میرے لیے بائیں ہاتھ کا کھیل ہے۔"},
-            {"en": "I am feeling under the weather.", "ur": "میری طبیعت کچھ ناساز ہے۔"},
-            {"en": "Don't beat around the bush.", "ur": "ادھر ادھر کی باتیں مت کرو، اصل بات پر آؤ۔"},
-            {"en": "Keep your chin up.", "ur": "ہمت مت ہارو۔"},
-            {"en": "Break a leg!", "ur": "نیک تمنائیں!"}
-        ]
 
-        # Dynamic example formatting based on direction
-        if source == "en":
-            examples = "\n".join([f"- {i['en']} -> {i['ur']}" for i in tuning_dataset])
-        else:
-            examples = "\n".join([f"- {i['ur']} -> {i['en']}" for i in tuning_dataset])
+        hit = self._lookup(source, target, text)
+        if hit is not None:
+            return hit
 
-        system_prompt = f"""You are an Elite Linguistic Expert specializing in {source} to {target} translation. 
-RULES FOR EXCELLENCE:
-1. SOUL OF THE MESSAGE: Never translate words. Translate the 'Soul' and 'Intent'.
-2. ZERO LITERALISM: Use native idioms/Muhaawras.
-3. HONORIFIC LOGIC: Use respectful forms (e.g., 'Aap' in Urdu).
-4. NATIVE FLOW: Ensure natural structural mapping.
+        result = self._translate_uncached(text, source, target, context_history)
+        self._cache_put(source, target, text, result)
+        return result
 
-EXAMPLES:
-{examples}
+    def _translate_uncached(
+        self,
+        text: str,
+        source: str,
+        target: str,
+        context_history: Optional[list[tuple[str, str]]] = None,
+    ) -> TranslationResult:
+        # No cloud keys: skip prompt construction and go straight to the fallback tiers
+        if not self._buckets:
+            return self._translate_fallback(text, source, target)
+
+        clean_text = _clean_input(text)
+        user_content = _user_content(clean_text, context_history)
 
-Output ONLY the polished final translation."""
+        system_prompt = _build_system_prompt(source, target)
 
         # --- TIER 1: ELITE NEURAL CORE (CLOUD INFERENCE) ---
-        groq_key = os.getenv("GROQ_API_KEY")
-        if groq_key:
-            try:
-                logger.info(f"Targeting Inference Engine for {source} -> {target}...")
-                headers = {
-                    "Authorization": f"Bearer {groq_key}",
-                    "Content-Type": "application/json"
-                }
-                
-                model_stack = ["llama-3.3-70b-versatile", "llama-3.1-70b-versatile"]
-                
-                for model_id in model_stack:
-                    try:
-                        data = {
-                            "model": model_id,
-                            "messages": [
-                                {"role": "system", "content": system_prompt},
-                                {"role": "user", "content": clean_text}
-                            ],
-                            "temperature": 0.5
-                        }
-                        resp = requests.post("https://api.groq.com/openai/v1/chat/completions", headers=headers, json=data, timeout=10)
-                        if resp.status_code == 200:
-                            return "⚡ " + resp.json()['choices'][0]['message']['content'].strip()
-                        else:
-                            logger.warning(f"Core {model_id} handshake failed: {resp.status_code}")
-                            continue
-                    except Exception as e:
-                        logger.error(f"Inference failure: {e}")
-                        continue
-            except Exception as e:
-                logger.error(f"Neural Core Error: {e}")
+        try:
+            logger.info(f"Targeting Inference Engine for {source} -> {target}...")
+            translated = self._groq_hedged(system_prompt, user_content, _estimate_output_tokens(clean_text))
+            if translated is not None:
+                return TranslationResult(translated, "groq")
+        except Exception as e:
+            logger.error(f"Neural Core Error: {e}")
+
+        return self._translate_fallback(text, source, target)
+
+    def _translate_fallback(self, text: str, source: str, target: str) -> TranslationResult:
+        """Tiers 2 and 3: local MarianMT, then deep-translator."""
+        return self._translate_fallback_many([text], source, target)[0]
 
+    def _translate_fallback_many(self, texts: list[str], source: str, target: str) -> list[TranslationResult]:
         # --- TIER 2: LOCAL FALLBACK (SAFE MODE) ---
         try:
             logger.info("Engaging Local Neural Transformer (Safe Mode)...")
-            return self._translate_local(text, source, target)
+            return self._translate_local_many(texts, source, target)
         except Exception as local_err:
             logger.error(f"Local Transformer failure: {local_err}")
 
@@ -167,8 +844,8 @@ Output ONLY the polished final translation."""
         try:
             from deep_translator import GoogleTranslator
             logger.info("Engaging Deep-Translator (Safety Net)...")
-            translated = GoogleTranslator(source=source, target=target).translate(text)
-            return "✨ " + translated
+            translator = GoogleTranslator(source=source, target=target)
+            return [TranslationResult(translator.translate(text), "google") for text in texts]
         except Exception as last_resort:
             logger.error(f"All translation tiers failed: {last_resort}")
-            return f"Error: Translation service unavailable. (Checked 3 Tiers)"
+            return [TranslationResult("Error: Translation service unavailable. (Checked 3 Tiers)", "error")] * len(texts)
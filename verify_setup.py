@@ -1,35 +1,208 @@
-from transformers import MarianMTModel, MarianTokenizer
+import os
+
+# Thread caps must be in place before transformers (and its tokenizers pool) is imported;
+# setdefault keeps any values already exported in the environment
+_MAX_THREADS = min(8, os.cpu_count() or 1)
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "true")
+os.environ.setdefault("RAYON_NUM_THREADS", str(_MAX_THREADS))
+
+import gc
+import hashlib
+import json
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Smoke-test inputs per model; add more strings here and they share one generate() call
+SAMPLES = {
+    "Helsinki-NLP/opus-mt-en-ur": ["Hello"],
+    "Helsinki-NLP/opus-mt-ur-en": ["شکریہ"],
+}
+
+# `python verify_setup.py --compile` also checks that the models work under torch.compile
+COMPILE = "--compile" in sys.argv
+# `--quantize` also runs an int8 dynamic-quantized copy (what USE_QUANTIZATION=1 serves) and diffs it against FP32
+QUANTIZE = "--quantize" in sys.argv
+# `--onnx` builds (once) and checks the optimized ONNX Runtime graphs the app's CPU fallback loads from models/onnx/
+ONNX = "--onnx" in sys.argv
+# `--force` re-runs checks that already passed for the same files and settings
+FORCE = "--force" in sys.argv
+# `--parallel` checks the models concurrently: faster, but both (and their variants) are in memory at once
+PARALLEL = "--parallel" in sys.argv
+
+# Fingerprints of model snapshots that already passed, so unchanged setups skip the load and generate
+VERIFIED_PATH = Path.home() / ".cache" / "translatorgo" / "verified.json"
+
+_print_lock = threading.Lock()
+_verified_lock = threading.Lock()
+
+def fingerprint(path, texts):
+    """
+    BLAKE2b over the snapshot's file names, sizes and mtimes plus everything else
+    the check depends on. Not a security boundary, just change detection.
+    """
+    import torch
+    import transformers
+
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((torch.__version__, transformers.__version__, COMPILE, QUANTIZE, ONNX, texts)).encode())
+    for file in sorted(Path(path).iterdir()):
+        stat = file.stat()
+        h.update(f"{file.name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return h.hexdigest()
+
+def load_verified():
+    try:
+        return json.loads(VERIFIED_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def mark_verified(model_name, digest):
+    with _verified_lock:
+        verified = load_verified()
+        verified[model_name] = digest
+        VERIFIED_PATH.parent.mkdir(parents=True, exist_ok=True)
+        VERIFIED_PATH.write_text(json.dumps(verified, indent=2), encoding="utf-8")
+
+def resolve_model(model_name):
+    """Local snapshot path when the model is already cached (no Hub round trips), else the Hub id to download."""
+    from huggingface_hub import snapshot_download
+    from huggingface_hub.utils import LocalEntryNotFoundError
+
+    try:
+        return snapshot_download(model_name, local_files_only=True)
+    except LocalEntryNotFoundError:
+        return model_name
+
+def load_model(model_cls, path):
+    """Load with fused SDPA attention, falling back to eager attention on transformers versions without it for Marian."""
+    # Load straight into the checkpoint's dtype without an extra full-size CPU copy
+    kwargs = {"low_cpu_mem_usage": True, "torch_dtype": "auto"}
+    try:
+        model = model_cls.from_pretrained(path, attn_implementation="sdpa", **kwargs)
+    except (ValueError, ImportError):
+        model = model_cls.from_pretrained(path, **kwargs)
+    return model.eval()
+
+def compile_model(model, tokenizer, texts):
+    """Compile the forward pass generate() calls per step, then warm it up so compile time isn't counted as a test."""
+    import torch
+
+    model.forward = torch.compile(model.forward, mode="reduce-overhead", dynamic=True)
+    translate_batch(tokenizer, model, texts)
+
+def translate_batch(tokenizer, model, texts):
+    """Tokenize texts together, run one padded generate() and decode every output."""
+    import torch
+
+    inputs = tokenizer(texts, return_tensors="pt", padding=True, truncation=True).to(model.device)
+    with torch.inference_mode():
+        # Greedy and short: a smoke test only needs to see the model produce sensible text
+        translated = model.generate(**inputs, num_beams=1, do_sample=False, max_new_tokens=16)
+    return tokenizer.batch_decode(translated, skip_special_tokens=True)
+
+def check_model(model_name, texts):
+    """Load and test one model, returning its report lines."""
+    import torch
+    from transformers import AutoTokenizer, MarianMTModel
+
+    lines = [f"\nChecking {model_name}..."]
+    try:
+        path = resolve_model(model_name)
+        # Only a cached snapshot can be fingerprinted; a first run always downloads and tests
+        digest = fingerprint(path, texts) if path != model_name else None
+        if digest is not None and not FORCE and load_verified().get(model_name) == digest:
+            return lines + ["  -> Unchanged since the last successful check; skipped (--force to re-run)"]
+
+        # The tokenizer is small and independent of the weights; load it while the model loads.
+        # Rust tokenizer when the model ships one; Marian falls back to its SentencePiece tokenizer
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            tokenizer_future = pool.submit(AutoTokenizer.from_pretrained, path, use_fast=True)
+            model = load_model(MarianMTModel, path)
+            tokenizer = tokenizer_future.result()
+        lines.append("  -> Loaded successfully" + (" (from local cache)" if path != model_name else ""))
+        lines.append(f"  -> Attention: {model.config._attn_implementation}")
+        lines.append(f"  -> Tokenizer: {type(tokenizer).__name__} ({'fast' if tokenizer.is_fast else 'slow'})")
+
+        # Alternative backends, diffed against FP32 below
+        variants = {}
+        if QUANTIZE:
+            # Quantize from the eager FP32 model, before any compilation touches it
+            variants["int8"] = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        if ONNX:
+            # Same loader (and cache) as the app, so the app's first fallback skips the export
+            from services.local_models import load_marian_model
+            # (it falls back to PyTorch without optimum or on a GPU, so label by what actually loaded)
+            onnx_model = load_marian_model(model_name)
+            variants[type(onnx_model).__name__] = onnx_model
+
+        # The int8 copy above is CPU-only; the reference model runs on the GPU (in FP16) when there is one
+        if torch.cuda.is_available():
+            model = model.half().to("cuda")
+            lines.append(f"  -> Running on {torch.cuda.get_device_name()} (FP16)")
+
+        if COMPILE and hasattr(torch, "compile"):
+            compile_model(model, tokenizer, texts)
+            lines.append("  -> Compiled and warmed up")
+
+        # Test translation
+        results = translate_batch(tokenizer, model, texts)
+        for text, result in zip(texts, results):
+            lines.append(f"  -> Test translation ('{text}'): {result}")
+
+        for label, variant in variants.items():
+            for text, want, got in zip(texts, results, translate_batch(tokenizer, variant, texts)):
+                verdict = "matches FP32" if got == want else "differs from FP32"
+                lines.append(f"  -> {label} translation ('{text}'): {got} ({verdict})")
+
+        if all(results):
+            if digest is None:
+                # Just downloaded: fingerprint the snapshot that now exists
+                path = resolve_model(model_name)
+                digest = fingerprint(path, texts) if path != model_name else None
+            if digest is not None:
+                mark_verified(model_name, digest)
+
+    except Exception as e:
+        lines.append(f"  -> Failed to load/translate: {e}")
+    return lines
+
+def verify_one(model_name, texts):
+    """Check one model, printing its report as a single uninterleaved block."""
+    import torch
+
+    lines = check_model(model_name, texts)
+    with _print_lock:
+        print("\n".join(lines))
+
+    # check_model's model and variants are unreachable now, but compiled graphs and quantized
+    # copies hold reference cycles that would keep the weights alive until a later GC pass
+    gc.collect()
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
 
 def verify_models():
     print("Verifying environment and downloading models if needed...")
     try:
         import torch
         print(f"Torch version: {torch.__version__}")
+        torch.set_num_threads(_MAX_THREADS)
         import transformers
         print(f"Transformers version: {transformers.__version__}")
     except ImportError as e:
         print(f"Import Error: {e}")
+        print("Install the dependencies with: pip install -r requirements.txt")
         return
 
-    models = ["Helsinki-NLP/opus-mt-en-ur", "Helsinki-NLP/opus-mt-ur-en"]
-    
-    for model_name in models:
-        print(f"\nChecking {model_name}...")
-        try:
-            tokenizer = MarianTokenizer.from_pretrained(model_name)
-            model = MarianMTModel.from_pretrained(model_name)
-            print("  -> Loaded successfully")
-            
-            # Test translation
-            text = "Hello" if "en-ur" in model_name else "شکریہ"
-            inputs = tokenizer(text, return_tensors="pt")
-            translated = model.generate(**inputs)
-            result = tokenizer.decode(translated[0], skip_special_tokens=True)
-            print(f"  -> Test translation ('{text}'): {result}")
-            
-        except Exception as e:
-            print(f"  -> Failed to load/translate: {e}")
+    if PARALLEL:
+        # Downloads and loads are I/O-bound and independent; check both models at once
+        with ThreadPoolExecutor(max_workers=len(SAMPLES)) as pool:
+            list(pool.map(verify_one, SAMPLES, SAMPLES.values()))
+    else:
+        # One model at a time, each freed before the next loads, so peak memory is a single model
+        for model_name, texts in SAMPLES.items():
+            verify_one(model_name, texts)
 
 if __name__ == "__main__":
     verify_models()